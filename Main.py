@@ -1,4 +1,3 @@
-from feat import Detector
 import cv2
 import numpy as np
 import time
@@ -8,19 +7,35 @@ from openpyxl import Workbook
 from openpyxl.chart import LineChart, Reference
 from datetime import datetime
 import os
+import multiprocessing
+import queue
+
+from dashboard import LiveDashboard
+from frame_ring import FrameRing, RingRecorder
 
 print("=" * 60)
 print("REAL-TIME VIDEO EMOTION DETECTOR WITH EXCEL EXPORT")
 print("=" * 60)
 
-# Initialize the detector
-print("Loading emotion detection models...")
-try:
-    detector = Detector()
-    print("✓ Detector loaded successfully!")
-except Exception as e:
-    print(f"Error loading detector: {e}")
-    exit(1)
+# Detector is created by load_detector() so that helpers can be imported without loading models
+detector = None
+
+
+def load_detector():
+    """Load the emotion detection models into the module-level detector"""
+    global detector
+
+    print("Loading emotion detection models...")
+    try:
+        # Imported here so capture, overlay and export work without the model stack installed
+        from feat import Detector
+        detector = Detector()
+        print("✓ Detector loaded successfully!")
+    except Exception as e:
+        print(f"Error loading detector: {e}")
+        exit(1)
+    return detector
+
 
 # Emotion labels dictionary
 emotion_labels = {
@@ -42,6 +57,16 @@ FIXED_TIME_STEP = 0.1  # Fixed time step in seconds for data recording (100ms)
 DISPLAY_FPS = True
 DISPLAY_ALL_EMOTIONS = True
 
+# Frame sharing configuration
+FRAME_RING_SLOTS = 8  # Preallocated shared-memory frame buffers shared by capture and consumers
+DETECT_IN_SUBPROCESS = True  # Run detection in a separate process reading frames from shared memory
+RECORD_VIDEO_PATH = None  # Set to a file path (e.g. "session.avi") to record the raw video
+
+# Live dashboard configuration
+LIVE_DASHBOARD = True  # Serve live charts at http://127.0.0.1:DASHBOARD_PORT/
+DASHBOARD_PORT = 8050
+DASHBOARD_BUCKET_SECONDS = 1.0  # Data points are aggregated into min/max/mean buckets of this width
+
 # Data collection for Excel export
 time_stamps = []
 emotion_data = {emotion: [] for emotion in emotion_labels.keys()}
@@ -51,6 +76,9 @@ gaze_data = {'gaze_x': [], 'gaze_y': []}  # Gaze tracking coordinates
 head_pose_data = {'pitch': [], 'yaw': [], 'roll': []}  # Head pose angles
 eye_data = {'blink_rate': [], 'eye_openness_left': [], 'eye_openness_right': []}  # Eye metrics
 
+# Live dashboard, started by main() when LIVE_DASHBOARD is enabled
+live_dashboard = None
+
 # Blink detection variables
 blink_counter = 0
 last_blink_check = 0
@@ -64,6 +92,7 @@ error_count = 0
 skipped_frames = 0
 start_time = time.time()
 last_recorded_time = 0  # Track last recorded timestamp for fixed intervals
+session_generation = 0  # Incremented on reset so detection results from before it are dropped
 
 
 # Font setup for better text display
@@ -95,7 +124,7 @@ def setup_fonts():
 font_large, font_medium, font_small = setup_fonts()
 
 
-def save_to_excel(filename=None):
+def save_to_excel(filename=None, save_directory=None, open_folder=True):
     """Save all collected emotion data to Excel with comprehensive charts"""
 
     if len(time_stamps) == 0:
@@ -107,6 +136,8 @@ def save_to_excel(filename=None):
     # Alternative options:
     # SAVE_DIRECTORY = "C:/EmotionData"  # Specific folder
     # SAVE_DIRECTORY = os.getcwd()  # Current working directory
+    if save_directory is not None:
+        SAVE_DIRECTORY = save_directory
 
     # Create directory if it doesn't exist
     if not os.path.exists(SAVE_DIRECTORY):
@@ -358,200 +389,383 @@ def save_to_excel(filename=None):
     print(f"   📋 2 sheets (Data + Statistics)")
 
     # Open file location in explorer (Windows)
-    if os.name == 'nt':  # Windows
+    if open_folder and os.name == 'nt':  # Windows
         os.startfile(SAVE_DIRECTORY)
 
     return True
 
 
+def detect_frame(frame):
+    """Run the detector on a single BGR frame and return its results"""
+    # Save frame temporarily for detection
+    temp_path = "temp_frame.jpg"
+    cv2.imwrite(temp_path, frame)
+
+    # Detect emotions and additional features
+    results = detector.detect_image(temp_path)
+
+    # Clean up temp file immediately
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    return results
+
+
+def record_metrics(current_time, current_emotions, current_gaze, current_head_pose,
+                   current_blink_rate, current_eye_openness):
+    """Append one fixed-interval data point to the Excel export collections"""
+    global last_recorded_time
+
+    for emotion in emotion_labels.keys():
+        emotion_data[emotion].append(current_emotions.get(emotion, 0.0))
+
+    time_stamps.append(round(current_time, 1))
+    last_recorded_time = current_time
+
+    # Record additional metrics
+    gaze_data['gaze_x'].append(current_gaze['x'])
+    gaze_data['gaze_y'].append(current_gaze['y'])
+    head_pose_data['pitch'].append(current_head_pose['pitch'])
+    head_pose_data['yaw'].append(current_head_pose['yaw'])
+    head_pose_data['roll'].append(current_head_pose['roll'])
+    eye_data['blink_rate'].append(current_blink_rate)
+    eye_data['eye_openness_left'].append(current_eye_openness['left'])
+    eye_data['eye_openness_right'].append(current_eye_openness['right'])
+
+    if live_dashboard is not None:
+        values = {emotion_labels[emotion]: current_emotions.get(emotion, 0.0) * 100 for emotion in emotion_labels}
+        values.update({
+            'Gaze X': current_gaze['x'],
+            'Gaze Y': current_gaze['y'],
+            'Pitch': current_head_pose['pitch'],
+            'Yaw': current_head_pose['yaw'],
+            'Roll': current_head_pose['roll'],
+            'Blinks/min': current_blink_rate,
+            'Left eye (%)': current_eye_openness['left'] * 100,
+            'Right eye (%)': current_eye_openness['right'] * 100
+        })
+        live_dashboard.push(current_time, values)
+
+
+def start_live_dashboard(port=DASHBOARD_PORT):
+    """Start the localhost dashboard that charts data points as they are recorded"""
+    global live_dashboard
+
+    charts = [
+        ('Emotions (%)', list(emotion_labels.values())),
+        ('Gaze', ['Gaze X', 'Gaze Y']),
+        ('Head Pose (degrees)', ['Pitch', 'Yaw', 'Roll']),
+        ('Blinks and Eye Openness', ['Blinks/min', 'Left eye (%)', 'Right eye (%)'])
+    ]
+    try:
+        live_dashboard = LiveDashboard(charts, port=port, bucket_seconds=DASHBOARD_BUCKET_SECONDS)
+    except OSError as e:
+        print(f"⚠ Could not start live dashboard: {e}")
+        return None
+
+    live_dashboard.start()
+    print(f"📈 Live dashboard: {live_dashboard.url}")
+    return live_dashboard
+
+
+def stop_live_dashboard():
+    """Stop the live dashboard if it is running"""
+    global live_dashboard
+
+    if live_dashboard is not None:
+        live_dashboard.stop()
+        live_dashboard = None
+
+
+def clear_collected_data():
+    """Clear all collected data points"""
+    time_stamps.clear()
+    for emotion in emotion_data:
+        emotion_data[emotion].clear()
+
+    # Reset additional metrics
+    gaze_data['gaze_x'].clear()
+    gaze_data['gaze_y'].clear()
+    head_pose_data['pitch'].clear()
+    head_pose_data['yaw'].clear()
+    head_pose_data['roll'].clear()
+    eye_data['blink_rate'].clear()
+    eye_data['eye_openness_left'].clear()
+    eye_data['eye_openness_right'].clear()
+
+    if live_dashboard is not None:
+        live_dashboard.reset()
+
+
+def draw_emotion_overlay(display_frame, x, y, current_emotions, current_gaze, current_head_pose,
+                         current_blink_rate, current_eye_openness):
+    """Draw the dominant emotion, metrics and emotion sidebar onto a frame using PIL"""
+    dominant_emotion = max(current_emotions, key=current_emotions.get)
+    dominant_score = current_emotions[dominant_emotion]
+
+    # Convert to PIL for better text rendering
+    pil_img = Image.fromarray(cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB))
+    draw = ImageDraw.Draw(pil_img)
+
+    # Get frame dimensions
+    frame_height, frame_width = display_frame.shape[:2]
+
+    # Draw dominant emotion above face box
+    emotion_text = f"{emotion_labels[dominant_emotion]}: {dominant_score:.1%}"
+    draw.text((x, y - 35), emotion_text, font=font_large, fill=(0, 255, 0))
+
+    # Draw additional metrics on the right side
+    metrics_x = frame_width - 250
+    metrics_y = 60
+
+    draw.text((metrics_x, metrics_y), "Additional Metrics:", font=font_medium, fill=(255, 255, 255))
+    metrics_y += 25
+
+    # Gaze direction
+    gaze_text = f"Gaze: ({current_gaze['x']:.2f}, {current_gaze['y']:.2f})"
+    draw.text((metrics_x, metrics_y), gaze_text, font=font_small, fill=(255, 0, 255))
+    metrics_y += 18
+
+    # Head pose
+    pose_text = f"Head: P:{current_head_pose['pitch']:.1f}° Y:{current_head_pose['yaw']:.1f}° R:{current_head_pose['roll']:.1f}°"
+    draw.text((metrics_x, metrics_y), pose_text, font=font_small, fill=(0, 255, 255))
+    metrics_y += 18
+
+    # Blink rate
+    blink_text = f"Blinks/min: {current_blink_rate:.1f}"
+    draw.text((metrics_x, metrics_y), blink_text, font=font_small, fill=(255, 255, 0))
+    metrics_y += 18
+
+    # Eye openness
+    eye_text = f"Eyes: L:{current_eye_openness['left']:.1%} R:{current_eye_openness['right']:.1%}"
+    draw.text((metrics_x, metrics_y), eye_text, font=font_small, fill=(0, 255, 0))
+
+    # Draw all emotions in sidebar if enabled
+    if DISPLAY_ALL_EMOTIONS:
+        y_offset = 60
+        draw.text((10, y_offset - 20), "Emotions:", font=font_medium, fill=(255, 255, 255))
+
+        for emotion, score in current_emotions.items():
+            score_text = f"{emotion_labels[emotion]}: {score:.1%}"
+
+            # Color code based on intensity
+            if score > 0.5:
+                color = (0, 255, 0)  # Green for high
+            elif score > 0.3:
+                color = (255, 255, 0)  # Yellow for medium
+            else:
+                color = (200, 200, 200)  # Gray for low
+
+            if emotion == dominant_emotion:
+                color = (0, 255, 100)  # Highlight dominant
+
+            draw.text((15, y_offset), score_text, font=font_small, fill=color)
+            y_offset += 18
+
+    # Convert back to OpenCV format
+    return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+
+
 def process_video_frame(frame, current_time):
     """Process a single video frame and collect emotion data"""
-    global detection_count, error_count, last_recorded_time, blink_counter, last_blink_check
-
     display_frame = frame.copy()
+
+    try:
+        results = detect_frame(frame)
+        return apply_detection_results(display_frame, results, current_time)
+
+    except Exception as e:
+        return draw_detection_error(display_frame, str(e)), False
+
+
+def draw_detection_error(display_frame, message):
+    """Count a failed detection and show it on the frame"""
+    global error_count
+
+    error_count += 1
+    cv2.putText(display_frame, f"Error: {message[:30]}", (50, 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+    return display_frame
+
+
+def apply_detection_results(display_frame, results, current_time):
+    """Draw detector results onto a frame and collect emotion data"""
+    global detection_count, blink_counter, last_blink_check
+
     should_record = False
 
     # Check if enough time has passed for next data point (fixed time step)
     if current_time - last_recorded_time >= FIXED_TIME_STEP:
         should_record = True
 
+    if results is not None and not results.empty and len(results) > 0:
+        detection_count += 1
+        first_result = results.iloc[0]
+
+        # Get face coordinates
+        x, y, w, h = 50, 50, 200, 200  # Default values
+
+        if 'FaceRectX' in results.columns:
+            x = int(first_result.get('FaceRectX', x))
+            y = int(first_result.get('FaceRectY', y))
+            w = int(first_result.get('FaceRectWidth', w))
+            h = int(first_result.get('FaceRectHeight', h))
+
+        # Draw face rectangle
+        cv2.rectangle(display_frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
+
+        # Extract additional metrics
+        current_gaze = {'x': 0, 'y': 0}
+        current_head_pose = {'pitch': 0, 'yaw': 0, 'roll': 0}
+        current_eye_openness = {'left': 1.0, 'right': 1.0}
+
+        # Gaze tracking (if available in results)
+        if 'gaze_x' in results.columns and 'gaze_y' in results.columns:
+            current_gaze['x'] = float(first_result.get('gaze_x', 0))
+            current_gaze['y'] = float(first_result.get('gaze_y', 0))
+
+            # Draw gaze direction arrow
+            gaze_end_x = int(x + w // 2 + current_gaze['x'] * 100)
+            gaze_end_y = int(y + h // 2 + current_gaze['y'] * 100)
+            cv2.arrowedLine(display_frame, (x + w // 2, y + h // 2),
+                            (gaze_end_x, gaze_end_y), (255, 0, 255), 2)
+
+        # Head pose estimation (pitch, yaw, roll)
+        if 'pitch' in results.columns:
+            current_head_pose['pitch'] = float(first_result.get('pitch', 0))
+            current_head_pose['yaw'] = float(first_result.get('yaw', 0))
+            current_head_pose['roll'] = float(first_result.get('roll', 0))
+
+        # Eye openness for blink detection
+        if 'AU43' in results.columns:  # AU43 = Eye closure
+            eye_closure = float(first_result.get('AU43', 0))
+            current_eye_openness['left'] = 1.0 - eye_closure
+            current_eye_openness['right'] = 1.0 - eye_closure
+
+            # Detect blinks
+            if eye_closure > blink_threshold and current_time - last_blink_check > 0.1:
+                blink_counter += 1
+                last_blink_check = current_time
+
+        # Calculate blink rate (blinks per minute)
+        time_window = min(current_time, 60)  # Use up to 60 seconds
+        current_blink_rate = (blink_counter / max(time_window, 1)) * 60
+
+        # Collect emotion scores (missing emotions are recorded as 0.0)
+        current_emotions = {}
+        for emotion in emotion_labels.keys():
+            if emotion in results.columns:
+                current_emotions[emotion] = float(first_result[emotion])
+
+        # Record all metrics at fixed intervals
+        if should_record:
+            record_metrics(current_time, current_emotions, current_gaze, current_head_pose,
+                           current_blink_rate, current_eye_openness)
+
+        # Draw dominant emotion and metrics
+        if current_emotions:
+            display_frame = draw_emotion_overlay(display_frame, x, y, current_emotions, current_gaze,
+                                                 current_head_pose, current_blink_rate,
+                                                 current_eye_openness)
+
+        return display_frame, True
+    else:
+        # No face detected
+        cv2.putText(display_frame, "No face detected", (50, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        return display_frame, False
+
+
+def draw_ui_overlay(display_frame, display_fps):
+    """Draw the stats bar, control buttons and data indicator onto a frame"""
+    # Get frame dimensions for UI elements
+    frame_height, frame_width = display_frame.shape[:2]
+
+    # Semi-transparent background for stats - full width, blended in place on the bar only
+    stats_bar = display_frame[5:41, :frame_width]
+    cv2.addWeighted(stats_bar, 0.7, np.full_like(stats_bar, 50), 0.3, 0, dst=stats_bar)
+
+    # Display statistics
+    stats_text = f"FPS: {display_fps} | Frames: {frame_count} | Detections: {detection_count}"
+    cv2.putText(display_frame, stats_text, (10, 25),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    # Control buttons overlay with bilingual text
+    button_y = frame_height - 60
+    cv2.rectangle(display_frame, (10, button_y), (420, frame_height - 10), (80, 80, 80), -1)
+    cv2.putText(display_frame, "[S] Save/ | [R] Reset | [Q] Quit",
+                (20, button_y + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    # Data collection indicator
+    if len(time_stamps) > 0:
+        data_text = f"Data points: {len(time_stamps)}"
+        cv2.putText(display_frame, data_text, (frame_width - 150, 25),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+    return display_frame
+
+
+def handle_detection_result(display_frame, result):
+    """Draw a result from the detection process unless it was started before the last reset"""
+    generation, result_time, results, error = result
+    if generation != session_generation:
+        return display_frame
+
     try:
-        # Save frame temporarily for detection
-        temp_path = "temp_frame.jpg"
-        cv2.imwrite(temp_path, frame)
-
-        # Detect emotions and additional features
-        results = detector.detect_image(temp_path)
-
-        # Clean up temp file immediately
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-        if results is not None and not results.empty and len(results) > 0:
-            detection_count += 1
-            first_result = results.iloc[0]
-
-            # Get face coordinates
-            x, y, w, h = 50, 50, 200, 200  # Default values
-
-            if 'FaceRectX' in results.columns:
-                x = int(first_result.get('FaceRectX', x))
-                y = int(first_result.get('FaceRectY', y))
-                w = int(first_result.get('FaceRectWidth', w))
-                h = int(first_result.get('FaceRectHeight', h))
-
-            # Draw face rectangle
-            cv2.rectangle(display_frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
-
-            # Extract additional metrics
-            current_gaze = {'x': 0, 'y': 0}
-            current_head_pose = {'pitch': 0, 'yaw': 0, 'roll': 0}
-            current_eye_openness = {'left': 1.0, 'right': 1.0}
-
-            # Gaze tracking (if available in results)
-            if 'gaze_x' in results.columns and 'gaze_y' in results.columns:
-                current_gaze['x'] = float(first_result.get('gaze_x', 0))
-                current_gaze['y'] = float(first_result.get('gaze_y', 0))
-
-                # Draw gaze direction arrow
-                gaze_end_x = int(x + w // 2 + current_gaze['x'] * 100)
-                gaze_end_y = int(y + h // 2 + current_gaze['y'] * 100)
-                cv2.arrowedLine(display_frame, (x + w // 2, y + h // 2),
-                                (gaze_end_x, gaze_end_y), (255, 0, 255), 2)
-
-            # Head pose estimation (pitch, yaw, roll)
-            if 'pitch' in results.columns:
-                current_head_pose['pitch'] = float(first_result.get('pitch', 0))
-                current_head_pose['yaw'] = float(first_result.get('yaw', 0))
-                current_head_pose['roll'] = float(first_result.get('roll', 0))
-
-            # Eye openness for blink detection
-            if 'AU43' in results.columns:  # AU43 = Eye closure
-                eye_closure = float(first_result.get('AU43', 0))
-                current_eye_openness['left'] = 1.0 - eye_closure
-                current_eye_openness['right'] = 1.0 - eye_closure
-
-                # Detect blinks
-                if eye_closure > blink_threshold and current_time - last_blink_check > 0.1:
-                    blink_counter += 1
-                    last_blink_check = current_time
-
-            # Calculate blink rate (blinks per minute)
-            time_window = min(current_time, 60)  # Use up to 60 seconds
-            current_blink_rate = (blink_counter / max(time_window, 1)) * 60
-
-            # Collect emotion data only at fixed time intervals
-            current_emotions = {}
-            for emotion in emotion_labels.keys():
-                if emotion in results.columns:
-                    score = float(first_result[emotion])
-                    current_emotions[emotion] = score
-                    if should_record:
-                        emotion_data[emotion].append(score)
-                else:
-                    if should_record:
-                        emotion_data[emotion].append(0.0)
-
-            # Record all metrics at fixed intervals
-            if should_record:
-                time_stamps.append(round(current_time, 1))
-                last_recorded_time = current_time
-
-                # Record additional metrics
-                gaze_data['gaze_x'].append(current_gaze['x'])
-                gaze_data['gaze_y'].append(current_gaze['y'])
-                head_pose_data['pitch'].append(current_head_pose['pitch'])
-                head_pose_data['yaw'].append(current_head_pose['yaw'])
-                head_pose_data['roll'].append(current_head_pose['roll'])
-                eye_data['blink_rate'].append(current_blink_rate)
-                eye_data['eye_openness_left'].append(current_eye_openness['left'])
-                eye_data['eye_openness_right'].append(current_eye_openness['right'])
-
-            # Find dominant emotion
-            if current_emotions:
-                dominant_emotion = max(current_emotions, key=current_emotions.get)
-                dominant_score = current_emotions[dominant_emotion]
-
-                # Convert to PIL for better text rendering
-                pil_img = Image.fromarray(cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB))
-                draw = ImageDraw.Draw(pil_img)
-
-                # Get frame dimensions
-                frame_height, frame_width = display_frame.shape[:2]
-
-                # Draw dominant emotion above face box
-                emotion_text = f"{emotion_labels[dominant_emotion]}: {dominant_score:.1%}"
-                draw.text((x, y - 35), emotion_text, font=font_large, fill=(0, 255, 0))
-
-                # Draw additional metrics on the right side
-                metrics_x = frame_width - 250
-                metrics_y = 60
-
-                draw.text((metrics_x, metrics_y), "Additional Metrics:", font=font_medium, fill=(255, 255, 255))
-                metrics_y += 25
-
-                # Gaze direction
-                gaze_text = f"Gaze: ({current_gaze['x']:.2f}, {current_gaze['y']:.2f})"
-                draw.text((metrics_x, metrics_y), gaze_text, font=font_small, fill=(255, 0, 255))
-                metrics_y += 18
-
-                # Head pose
-                pose_text = f"Head: P:{current_head_pose['pitch']:.1f}° Y:{current_head_pose['yaw']:.1f}° R:{current_head_pose['roll']:.1f}°"
-                draw.text((metrics_x, metrics_y), pose_text, font=font_small, fill=(0, 255, 255))
-                metrics_y += 18
-
-                # Blink rate
-                blink_text = f"Blinks/min: {current_blink_rate:.1f}"
-                draw.text((metrics_x, metrics_y), blink_text, font=font_small, fill=(255, 255, 0))
-                metrics_y += 18
-
-                # Eye openness
-                eye_text = f"Eyes: L:{current_eye_openness['left']:.1%} R:{current_eye_openness['right']:.1%}"
-                draw.text((metrics_x, metrics_y), eye_text, font=font_small, fill=(0, 255, 0))
-
-                # Draw all emotions in sidebar if enabled
-                if DISPLAY_ALL_EMOTIONS:
-                    y_offset = 60
-                    draw.text((10, y_offset - 20), "Emotions:", font=font_medium, fill=(255, 255, 255))
-
-                    for emotion, score in current_emotions.items():
-                        score_text = f"{emotion_labels[emotion]}: {score:.1%}"
-
-                        # Color code based on intensity
-                        if score > 0.5:
-                            color = (0, 255, 0)  # Green for high
-                        elif score > 0.3:
-                            color = (255, 255, 0)  # Yellow for medium
-                        else:
-                            color = (200, 200, 200)  # Gray for low
-
-                        if emotion == dominant_emotion:
-                            color = (0, 255, 100)  # Highlight dominant
-
-                        draw.text((15, y_offset), score_text, font=font_small, fill=color)
-                        y_offset += 18
-
-                # Convert back to OpenCV format
-                display_frame = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-
-            return display_frame, True
+        if error is not None:
+            display_frame = draw_detection_error(display_frame, error)
         else:
-            # No face detected
-            cv2.putText(display_frame, "No face detected", (50, 50),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            return display_frame, False
-
+            display_frame, detected = apply_detection_results(display_frame, results, result_time)
     except Exception as e:
-        error_count += 1
-        cv2.putText(display_frame, f"Error: {str(e)[:30]}", (50, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        return display_frame, False
+        display_frame = draw_detection_error(display_frame, str(e))
+    return display_frame
+
+
+def reset_session():
+    """Reset all data collection and counters and start a new session"""
+    global frame_count, skipped_frames, detection_count, error_count, start_time, last_recorded_time
+    global blink_counter, last_blink_check, session_generation
+
+    # Reset all data collections
+    clear_collected_data()
+
+    # Reset counters
+    detection_count = 0
+    error_count = 0
+    frame_count = 0
+    skipped_frames = 0
+    blink_counter = 0
+    start_time = time.time()
+    last_recorded_time = 0
+    last_blink_check = 0
+    session_generation += 1
+
+
+def detection_worker(ring, tasks, results):
+    """Run the detector in a separate process on frames read from the shared frame ring"""
+    load_detector()
+    results.put(None)  # Signal that the models are loaded
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        slot, current_time, generation = task
+        try:
+            frame_results = detect_frame(ring.view(slot))
+            ring.release(slot)
+            results.put((generation, current_time, frame_results, None))
+        except Exception as e:
+            ring.release(slot)
+            results.put((generation, current_time, None, str(e)))
+
+    ring.close()
 
 
 # Main video processing loop
 def main():
-    global frame_count, skipped_frames, detection_count, error_count, start_time, last_recorded_time
-    global blink_counter, last_blink_check
+    global frame_count, skipped_frames
 
     # Open video source
     print(f"\n🎥 Opening video source: {VIDEO_SOURCE}")
@@ -577,118 +791,168 @@ def main():
     print("   'S' - Save data to Excel")
     print("   'R' - Reset data collection")
     print("   'Q' - Quit")
-    print("\n🔄 Processing")
 
-    # FPS calculation variables
-    fps_start_time = time.time()
-    fps_frame_count = 0
-    display_fps = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("\n⚠ End of video or camera disconnected")
-            break
-
-        frame_count += 1
-        current_time = time.time() - start_time
+    # Frames are decoded into a shared-memory ring sized from the first frame
+    ret, first_frame = cap.read()
+    if not ret:
+        print("❌ Error: Could not read from video source!")
+        cap.release()
+        return
 
-        # Calculate display FPS
-        fps_frame_count += 1
-        if time.time() - fps_start_time >= 1.0:
-            display_fps = fps_frame_count
-            fps_frame_count = 0
-            fps_start_time = time.time()
+    ring = FrameRing(FRAME_RING_SLOTS, first_frame.shape, first_frame.dtype)
+    display_buffer = np.empty_like(first_frame)
+    dropped_frames = 0
 
-        # Process frame based on sampling rate
-        if frame_count % PROCESS_EVERY_N_FRAMES == 0:
-            display_frame, detected = process_video_frame(frame, current_time)
+    worker = None
+    recorder = None
+    try:
+        detection_pending = False
+        if DETECT_IN_SUBPROCESS:
+            detection_tasks = multiprocessing.Queue()
+            detection_results = multiprocessing.Queue()
+            worker = multiprocessing.Process(target=detection_worker,
+                                             args=(ring, detection_tasks, detection_results), daemon=True)
+            worker.start()
+
+            # Wait for the models to load before capturing, like the in-process detector
+            while True:
+                try:
+                    detection_results.get(timeout=1.0)
+                    break
+                except queue.Empty:
+                    if not worker.is_alive():
+                        print("❌ Error: Detection process failed to start!")
+                        return
+            print("✓ Detection process started")
         else:
-            display_frame = frame
-            skipped_frames += 1
-
-        # Get frame dimensions for UI elements
-        frame_height, frame_width = display_frame.shape[:2]
+            load_detector()
+
+        if RECORD_VIDEO_PATH:
+            recorder = RingRecorder(ring, RECORD_VIDEO_PATH, fps)
+            if recorder.is_opened():
+                recorder.start()
+                print(f"⏺ Recording video to: {RECORD_VIDEO_PATH}")
+            else:
+                print(f"⚠ Could not open video recorder: {RECORD_VIDEO_PATH}")
+                recorder = None
+
+        if LIVE_DASHBOARD:
+            start_live_dashboard()
+
+        print("\n🔄 Processing")
+
+        # FPS calculation variables
+        fps_start_time = time.time()
+        fps_frame_count = 0
+        display_fps = 0
+
+        while True:
+            if first_frame is not None:
+                # The frame used to size the ring is processed like any other
+                slot = ring.acquire()
+                np.copyto(ring.view(slot), first_frame)
+                first_frame = None
+            else:
+                ret, slot = ring.read(cap)
+                if not ret:
+                    print("\n⚠ End of video or camera disconnected")
+                    break
+                if slot is None:
+                    # Every slot is still held by a consumer
+                    dropped_frames += 1
+                    continue
+
+            frame = ring.view(slot)
+            frame_count += 1
+            current_time = time.time() - start_time
+
+            # Calculate display FPS
+            fps_frame_count += 1
+            if time.time() - fps_start_time >= 1.0:
+                display_fps = fps_frame_count
+                fps_frame_count = 0
+                fps_start_time = time.time()
+
+            if recorder is not None:
+                recorder.submit(slot)
+
+            # Process frame based on sampling rate
+            if frame_count % PROCESS_EVERY_N_FRAMES == 0 and worker is not None:
+                if detection_pending:
+                    skipped_frames += 1  # Detector is still busy with an earlier frame
+                else:
+                    ring.retain(slot)
+                    detection_tasks.put((slot, current_time, session_generation))
+                    detection_pending = True
+                np.copyto(display_buffer, frame)
+                display_frame = display_buffer
+            elif frame_count % PROCESS_EVERY_N_FRAMES == 0:
+                display_frame, detected = process_video_frame(frame, current_time)
+            else:
+                np.copyto(display_buffer, frame)
+                display_frame = display_buffer
+                skipped_frames += 1
+            ring.release(slot)
+
+            # Draw results from the detection process as they arrive
+            if worker is not None:
+                try:
+                    result = detection_results.get_nowait()
+                except queue.Empty:
+                    if detection_pending and not worker.is_alive():
+                        print("\n❌ Detection process stopped unexpectedly")
+                        break
+                else:
+                    detection_pending = False
+                    display_frame = handle_detection_result(display_frame, result)
 
-        # Add UI overlay with full width background
-        overlay = display_frame.copy()
+            display_frame = draw_ui_overlay(display_frame, display_fps)
+            frame_height, frame_width = display_frame.shape[:2]
 
-        # Semi-transparent background for stats - full width
-        cv2.rectangle(overlay, (0, 5), (frame_width, 40), (50, 50, 50), -1)
-        display_frame = cv2.addWeighted(display_frame, 0.7, overlay, 0.3, 0)
+            # Display the frame
+            cv2.imshow('Real-time Emotion Detection', display_frame)
 
-        # Display statistics
-        stats_text = f"FPS: {display_fps} | Frames: {frame_count} | Detections: {detection_count}"
-        cv2.putText(display_frame, stats_text, (10, 25),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            # Handle keyboard input - support both English and Russian layouts
+            key = cv2.waitKey(1) & 0xFF
 
-        # Control buttons overlay with bilingual text
-        button_y = frame_height - 60
-        cv2.rectangle(display_frame, (10, button_y), (420, frame_height - 10), (80, 80, 80), -1)
-        cv2.putText(display_frame, "[S] Save/ | [R] Reset | [Q] Quit",
-                    (20, button_y + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            # Support both English and Russian keyboard layouts
+            if key == ord('q') or key == ord('Q') or key == ord('й') or key == ord('Й'):
+                print("\n👋 Quitting...")
+                break
 
-        # Data collection indicator
+            elif key == ord('s') or key == ord('S') or key == ord('ы') or key == ord('Ы'):
+                if save_to_excel():
+                    # Show confirmation on screen
+                    cv2.putText(display_frame, "DATA SAVED!",
+                                (frame_width // 2 - 150, frame_height // 2),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
+                    cv2.imshow('Real-time Emotion Detection', display_frame)
+                    cv2.waitKey(1000)
+
+            elif key == ord('r') or key == ord('R') or key == ord('к') or key == ord('К'):
+                reset_session()
+                print("\n🔄 All data collection reset!")
+
+    finally:
+        # Cleanup runs on every exit so the worker, recorder, shared memory and dashboard never leak
+        cap.release()
+        cv2.destroyAllWindows()
+
+        if worker is not None:
+            if worker.is_alive():
+                detection_tasks.put(None)
+                worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        if recorder is not None:
+            recorder.stop()
+        ring.close()
+        stop_live_dashboard()
+
+        # Auto-save if data exists
         if len(time_stamps) > 0:
-            data_text = f"Data points: {len(time_stamps)}"
-            cv2.putText(display_frame, data_text, (frame_width - 150, 25),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-
-        # Display the frame
-        cv2.imshow('Real-time Emotion Detection', display_frame)
-
-        # Handle keyboard input - support both English and Russian layouts
-        key = cv2.waitKey(1) & 0xFF
-
-        # Support both English and Russian keyboard layouts
-        if key == ord('q') or key == ord('Q') or key == ord('й') or key == ord('Й'):
-            print("\n👋 Quitting...")
-            break
-
-        elif key == ord('s') or key == ord('S') or key == ord('ы') or key == ord('Ы'):
-            if save_to_excel():
-                # Show confirmation on screen
-                cv2.putText(display_frame, "DATA SAVED!",
-                            (frame_width // 2 - 150, frame_height // 2),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
-                cv2.imshow('Real-time Emotion Detection', display_frame)
-                cv2.waitKey(1000)
-
-        elif key == ord('r') or key == ord('R') or key == ord('к') or key == ord('К'):
-            # Reset all data collections
-            time_stamps.clear()
-            for emotion in emotion_data:
-                emotion_data[emotion].clear()
-
-            # Reset additional metrics
-            gaze_data['gaze_x'].clear()
-            gaze_data['gaze_y'].clear()
-            head_pose_data['pitch'].clear()
-            head_pose_data['yaw'].clear()
-            head_pose_data['roll'].clear()
-            eye_data['blink_rate'].clear()
-            eye_data['eye_openness_left'].clear()
-            eye_data['eye_openness_right'].clear()
-
-            # Reset counters
-            detection_count = 0
-            error_count = 0
-            frame_count = 0
-            skipped_frames = 0
-            blink_counter = 0
-            start_time = time.time()
-            last_recorded_time = 0
-            last_blink_check = 0
-            print("\n🔄 All data collection reset!")
-
-    # Cleanup
-    cap.release()
-    cv2.destroyAllWindows()
-
-    # Auto-save if data exists
-    if len(time_stamps) > 0:
-        print("\n💾 Auto-saving collected data...")
-        save_to_excel()
+            print("\n💾 Auto-saving collected data...")
+            save_to_excel()
 
     # Final statistics
     print("\n" + "=" * 60)
@@ -696,6 +960,9 @@ def main():
     print(f"   Total frames: {frame_count}")
     print(f"   Processed frames: {frame_count - skipped_frames}")
     print(f"   Skipped frames: {skipped_frames}")
+    print(f"   Dropped frames: {dropped_frames}")
+    if recorder is not None:
+        print(f"   Frames not recorded: {recorder.dropped_frames}")
     print(f"   Successful detections: {detection_count}")
     print(f"   Errors: {error_count}")
     if frame_count > 0:
@@ -707,4 +974,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Required for the detection process in PyInstaller builds
     main()
\ No newline at end of file
@@ -0,0 +1,648 @@
+"""
+Headless CPU benchmark for the emotion detector pipeline.
+
+Measures capture (plain and into the shared frame ring), detection, recording,
+dashboard pushes, overlay and export separately on synthetic generated clips
+and on recorded clips placed in benchmark_fixtures/, and writes machine-readable
+JSON results that can be compared across commits.
+
+Examples:
+    python benchmark.py
+    python benchmark.py --skip-detection --output results_new.json
+    python benchmark.py --compare results_old.json --threshold 0.25
+
+Every stage discards --warmup iterations before timing and is run for --rounds
+rounds; reported percentiles are the median of the per-round percentiles, and
+the spread between rounds is stored so comparisons can ignore run-to-run noise.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# Benchmarks always run on CPU, even on machines with a GPU
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import cv2
+import numpy as np
+
+import Main
+from dashboard import LiveDashboard
+from frame_ring import FrameRing
+
+RESULTS_SCHEMA_VERSION = 2
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+FIXTURE_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+SYNTHETIC_SEED = 1234
+SYNTHETIC_FPS = 30
+
+# Canned detector output used by the stages that do not need the real models
+SAMPLE_EMOTIONS = {
+    'anger': 0.05,
+    'disgust': 0.02,
+    'fear': 0.03,
+    'happiness': 0.62,
+    'sadness': 0.08,
+    'surprise': 0.10,
+    'neutral': 0.10
+}
+SAMPLE_GAZE = {'x': 0.12, 'y': -0.05}
+SAMPLE_HEAD_POSE = {'pitch': 4.2, 'yaw': -11.5, 'roll': 1.3}
+SAMPLE_EYE_OPENNESS = {'left': 0.85, 'right': 0.83}
+SAMPLE_BLINK_RATE = 14.0
+
+
+def parse_resolution(text):
+    """Parse a WIDTHxHEIGHT string"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def generate_synthetic_frames(width, height, count, seed=SYNTHETIC_SEED):
+    """Generate deterministic face-like BGR frames with head motion and blinks"""
+    rng = np.random.default_rng(seed)
+
+    # Static textured background, generated once
+    gradient = np.linspace(40, 160, width, dtype=np.float32)
+    background = np.repeat(gradient[np.newaxis, :], height, axis=0)
+    background = np.stack([background, background * 0.9, background * 0.8], axis=2)
+    background += rng.normal(0, 6, size=background.shape)
+    background = np.clip(background, 0, 255).astype(np.uint8)
+
+    face_w = width // 6
+    face_h = int(face_w * 1.3)
+    frames = []
+
+    for i in range(count):
+        frame = background.copy()
+
+        # Head drifts slowly around the centre of the frame
+        cx = int(width / 2 + np.sin(i / 20.0) * width / 10)
+        cy = int(height / 2 + np.cos(i / 25.0) * height / 20)
+
+        cv2.ellipse(frame, (cx, cy), (face_w, face_h), 0, 0, 360, (140, 170, 210), -1)
+
+        # Eyes close for a few frames once per second
+        eye_y = cy - face_h // 4
+        eye_dx = face_w // 2
+        eye_h = 2 if i % SYNTHETIC_FPS < 4 else max(face_h // 12, 3)
+        for ex in (cx - eye_dx, cx + eye_dx):
+            cv2.ellipse(frame, (ex, eye_y), (face_w // 6, eye_h), 0, 0, 360, (40, 30, 30), -1)
+
+        # Mouth alternates between neutral and smiling
+        mouth_h = face_h // 8 if (i // SYNTHETIC_FPS) % 2 else face_h // 24
+        cv2.ellipse(frame, (cx, cy + face_h // 2), (face_w // 2, mouth_h), 0, 0, 180, (60, 60, 150), 3)
+
+        # Per-frame sensor noise so encoders cannot skip static frames
+        noise = rng.integers(-4, 5, size=frame.shape, dtype=np.int16)
+        frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        frames.append(frame)
+
+    return frames
+
+
+def write_clip(frames, path, fps=SYNTHETIC_FPS):
+    """Write frames to an MJPG clip so capture can be measured on a real file"""
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open video writer for {path}")
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def summarize(durations, items=None):
+    """Compute latency percentiles (ms) and throughput for a list of durations in seconds"""
+    if not durations:
+        return None
+
+    samples = np.array(durations, dtype=np.float64) * 1000.0
+    total = float(np.sum(durations))
+    if items is None:
+        items = len(durations)
+
+    return {
+        'samples': len(durations),
+        'mean_ms': float(np.mean(samples)),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'max_ms': float(np.max(samples)),
+        'throughput_per_s': items / total if total > 0 else 0.0
+    }
+
+
+def summarize_rounds(rounds, items=None):
+    """Summarize each round separately and report the median of every statistic across rounds
+
+    The relative spread (max - min) / median of p50 and p90 between rounds is
+    kept so compare_results can tell a regression from run-to-run noise.
+    """
+    per_round = [summarize(durations, items) for durations in rounds]
+    per_round = [stats for stats in per_round if stats is not None]
+    if not per_round:
+        return None
+
+    summary = {key: float(np.median([stats[key] for stats in per_round]))
+               for key in per_round[0] if key != 'samples'}
+    summary['samples'] = sum(stats['samples'] for stats in per_round)
+    summary['rounds'] = len(per_round)
+    for metric in ('p50_ms', 'p90_ms'):
+        values = [stats[metric] for stats in per_round]
+        median = float(np.median(values))
+        summary[f"{metric[:3]}_spread"] = (max(values) - min(values)) / median if median > 0 else 0.0
+    return summary
+
+
+def bench_capture(path, max_frames, warmup):
+    """Time cap.read() on a clip, returning per-frame latencies and decoded frames
+
+    The first warmup reads are decoded but neither timed nor returned.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video source {path}")
+
+    durations = []
+    frames = []
+    while len(frames) < max_frames + warmup:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        elapsed = time.perf_counter() - t0
+        if not ret:
+            break
+        durations.append(elapsed)
+        frames.append(frame)
+
+    cap.release()
+    return durations[warmup:], frames[warmup:]
+
+
+def bench_ring_capture(path, max_frames, warmup, slot_count=Main.FRAME_RING_SLOTS):
+    """Time decoding straight into shared-memory ring slots"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video source {path}")
+
+    ret, first_frame = cap.read()
+    if not ret:
+        cap.release()
+        return []
+
+    ring = FrameRing(slot_count, first_frame.shape, first_frame.dtype)
+    durations = []
+    try:
+        while len(durations) < max_frames + warmup:
+            t0 = time.perf_counter()
+            ret, slot = ring.read(cap)
+            elapsed = time.perf_counter() - t0
+            if not ret:
+                break
+            durations.append(elapsed)
+            if slot is not None:
+                ring.release(slot)
+    finally:
+        cap.release()
+        ring.close()
+    return durations[warmup:]
+
+
+def bench_detection(frames, count, warmup):
+    """Time the detector on individual frames"""
+    for frame in frames[:warmup]:
+        Main.detect_frame(frame)
+
+    durations = []
+    for frame in frames[warmup:warmup + count]:
+        t0 = time.perf_counter()
+        Main.detect_frame(frame)
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+def bench_recording(count, warmup):
+    """Time appending fixed-interval data points to the export collections"""
+    Main.clear_collected_data()
+
+    durations = []
+    for i in range(warmup + count):
+        t0 = time.perf_counter()
+        Main.record_metrics(i * Main.FIXED_TIME_STEP, SAMPLE_EMOTIONS, SAMPLE_GAZE, SAMPLE_HEAD_POSE,
+                            SAMPLE_BLINK_RATE, SAMPLE_EYE_OPENNESS)
+        durations.append(time.perf_counter() - t0)
+
+    Main.clear_collected_data()
+    return durations[warmup:]
+
+
+def bench_dashboard_push(count, warmup):
+    """Time pushing data points to a running live dashboard from the capture loop"""
+    dashboard = LiveDashboard([('Emotions (%)', list(Main.emotion_labels.values()))], port=0)
+    dashboard.start()
+
+    values = {Main.emotion_labels[emotion]: score * 100 for emotion, score in SAMPLE_EMOTIONS.items()}
+    durations = []
+    try:
+        for i in range(warmup + count):
+            t0 = time.perf_counter()
+            dashboard.push(i * Main.FIXED_TIME_STEP, values)
+            durations.append(time.perf_counter() - t0)
+    finally:
+        dashboard.stop()
+    return durations[warmup:]
+
+
+def bench_overlays(frames, warmup):
+    """Time the PIL emotion overlay and the OpenCV UI overlay separately
+
+    The first warmup frames are drawn one extra time up front and those timings discarded.
+    """
+    emotion_durations = []
+    ui_durations = []
+    height, width = frames[0].shape[:2]
+    x, y = width // 3, height // 4
+
+    for frame in frames[:warmup] + frames:
+        display_frame = frame.copy()
+
+        t0 = time.perf_counter()
+        display_frame = Main.draw_emotion_overlay(display_frame, x, y, SAMPLE_EMOTIONS, SAMPLE_GAZE,
+                                                  SAMPLE_HEAD_POSE, SAMPLE_BLINK_RATE, SAMPLE_EYE_OPENNESS)
+        emotion_durations.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        Main.draw_ui_overlay(display_frame, SYNTHETIC_FPS)
+        ui_durations.append(time.perf_counter() - t0)
+
+    return emotion_durations[warmup:], ui_durations[warmup:]
+
+
+def bench_pipeline(frames, every_n, warmup):
+    """Time the headless main loop body for a given PROCESS_EVERY_N_FRAMES value
+
+    The first warmup * every_n frames (warmup detections) are not timed.
+    """
+    Main.clear_collected_data()
+    Main.last_recorded_time = 0
+
+    display_buffer = np.empty_like(frames[0])
+    durations = []
+    warmup_frames = warmup * every_n
+    for i, frame in enumerate(frames[:warmup_frames] + frames, start=1):
+        t0 = time.perf_counter()
+        if i % every_n == 0:
+            display_frame, _ = Main.process_video_frame(frame, i / SYNTHETIC_FPS)
+        else:
+            np.copyto(display_buffer, frame)
+            display_frame = display_buffer
+        Main.draw_ui_overlay(display_frame, SYNTHETIC_FPS)
+        durations.append(time.perf_counter() - t0)
+
+    Main.clear_collected_data()
+    return durations[warmup_frames:]
+
+
+def bench_subprocess_pipeline(frames, every_n, count, warmup, rounds):
+    """Time the default main loop with detection in a separate process
+
+    Mirrors main(): frames go into ring slots (copied in place of decoding), due
+    frames are submitted to detection_worker by slot index and results are drawn
+    with handle_detection_result. The worker loads its models once; after warmup
+    results, each round loops over the frames until count results arrive.
+    Returns one (loop durations, submit-to-result latencies) pair per round.
+    """
+    Main.clear_collected_data()
+    Main.last_recorded_time = 0
+
+    ring = FrameRing(Main.FRAME_RING_SLOTS, frames[0].shape, frames[0].dtype)
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    worker = multiprocessing.Process(target=Main.detection_worker, args=(ring, tasks, results), daemon=True)
+    worker.start()
+
+    display_buffer = np.empty_like(frames[0])
+    round_results = []
+    durations = []
+    latencies = []
+    submitted_at = None
+    received = 0
+    try:
+        # Wait for the models to load in the worker
+        while True:
+            try:
+                results.get(timeout=1.0)
+                break
+            except queue.Empty:
+                if not worker.is_alive():
+                    raise RuntimeError("Detection process failed to start")
+
+        frame_index = 0
+        while received < warmup + count * rounds:
+            t0 = time.perf_counter()
+            frame_index += 1
+            slot = ring.acquire()
+            if slot is None:
+                raise RuntimeError("Frame ring exhausted")
+            np.copyto(ring.view(slot), frames[frame_index % len(frames)])
+
+            if frame_index % every_n == 0 and submitted_at is None:
+                ring.retain(slot)
+                tasks.put((slot, frame_index / SYNTHETIC_FPS, Main.session_generation))
+                submitted_at = time.perf_counter()
+            np.copyto(display_buffer, ring.view(slot))
+            display_frame = display_buffer
+            ring.release(slot)
+
+            try:
+                result = results.get_nowait()
+            except queue.Empty:
+                if submitted_at is not None and not worker.is_alive():
+                    raise RuntimeError("Detection process stopped unexpectedly")
+            else:
+                if received >= warmup:
+                    latencies.append(time.perf_counter() - submitted_at)
+                received += 1
+                submitted_at = None
+                display_frame = Main.handle_detection_result(display_frame, result)
+
+            Main.draw_ui_overlay(display_frame, SYNTHETIC_FPS)
+            if received >= warmup:
+                durations.append(time.perf_counter() - t0)
+            if len(latencies) == count:
+                round_results.append((durations, latencies))
+                durations = []
+                latencies = []
+    finally:
+        if worker.is_alive():
+            tasks.put(None)
+            worker.join(timeout=10)
+        if worker.is_alive():
+            worker.terminate()
+        ring.close()
+        Main.clear_collected_data()
+
+    return round_results
+
+
+def bench_export(rows, repeats, warmup, directory):
+    """Time save_to_excel for a session with the given number of data points"""
+    Main.clear_collected_data()
+    for i in range(rows):
+        Main.record_metrics(i * Main.FIXED_TIME_STEP, SAMPLE_EMOTIONS, SAMPLE_GAZE, SAMPLE_HEAD_POSE,
+                            SAMPLE_BLINK_RATE, SAMPLE_EYE_OPENNESS)
+
+    durations = []
+    for i in range(warmup + repeats):
+        t0 = time.perf_counter()
+        Main.save_to_excel(f"benchmark_export_{i}.xlsx", save_directory=directory, open_folder=False)
+        durations.append(time.perf_counter() - t0)
+
+    Main.clear_collected_data()
+    return durations[warmup:]
+
+
+def get_commit():
+    """Return the current git commit and whether the working tree is dirty"""
+    repo_directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, cwd=repo_directory,
+                                         stderr=subprocess.DEVNULL).strip()
+        status = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                         text=True, cwd=repo_directory, stderr=subprocess.DEVNULL)
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def collect_sources(args, work_directory):
+    """Build the list of (name, path) clips: synthetic ones first, then recorded fixtures"""
+    sources = []
+
+    for resolution in args.resolutions.split(','):
+        width, height = parse_resolution(resolution)
+        frames = generate_synthetic_frames(width, height, args.frames)
+        path = os.path.join(work_directory, f"synthetic_{width}x{height}.avi")
+        write_clip(frames, path)
+        sources.append((f"synthetic_{width}x{height}", path))
+
+    fixture_paths = list(args.video)
+    if not args.no_fixtures and os.path.isdir(FIXTURES_DIRECTORY):
+        for path in sorted(glob.glob(os.path.join(FIXTURES_DIRECTORY, '*'))):
+            if path.lower().endswith(FIXTURE_EXTENSIONS):
+                fixture_paths.append(path)
+
+    for path in fixture_paths:
+        sources.append((os.path.splitext(os.path.basename(path))[0], path))
+
+    return sources
+
+
+def run_benchmarks(args):
+    """Run every stage for args.rounds rounds and return the results document"""
+    rounds = defaultdict(list)
+    items = {}
+
+    if not args.skip_detection:
+        Main.load_detector()
+
+    with tempfile.TemporaryDirectory(prefix="emotion_bench_") as work_directory:
+        for name, path in collect_sources(args, work_directory):
+            print(f"\n🎥 {name}")
+
+            for round_index in range(args.rounds):
+                capture_durations, frames = bench_capture(path, args.frames, args.warmup)
+                if not frames:
+                    break
+                rounds[f"{name}/capture"].append(capture_durations)
+                rounds[f"{name}/capture_ring"].append(bench_ring_capture(path, args.frames, args.warmup))
+
+                emotion_durations, ui_durations = bench_overlays(frames, args.warmup)
+                rounds[f"{name}/overlay_emotion"].append(emotion_durations)
+                rounds[f"{name}/overlay_ui"].append(ui_durations)
+
+                if not args.skip_detection:
+                    rounds[f"{name}/detection"].append(bench_detection(frames, args.detect_frames, args.warmup))
+
+                    for every_n in [int(n) for n in args.every_n.split(',')]:
+                        pipeline_frames = frames[:args.detect_frames * every_n]
+                        rounds[f"{name}/pipeline_every_{every_n}"].append(
+                            bench_pipeline(pipeline_frames, every_n, args.warmup))
+
+            if not frames:
+                print(f"   ⚠ No frames decoded from {path}, skipping")
+                continue
+
+            if not args.skip_detection:
+                # One worker per setting: the models are loaded once, not once per round
+                for every_n in [int(n) for n in args.every_n.split(',')]:
+                    for loop_durations, latencies in bench_subprocess_pipeline(
+                            frames, every_n, args.detect_frames, args.warmup, args.rounds):
+                        rounds[f"{name}/pipeline_subprocess_every_{every_n}"].append(loop_durations)
+                        rounds[f"{name}/subprocess_detection_latency_every_{every_n}"].append(latencies)
+
+        for round_index in range(args.rounds):
+            rounds["recording"].append(bench_recording(args.export_rows, args.warmup))
+            rounds["dashboard_push"].append(bench_dashboard_push(args.export_rows, args.warmup))
+            # A single warmup export: each one serializes the whole session
+            rounds["export"].append(bench_export(args.export_rows, args.export_repeats, 1, work_directory))
+        items["export"] = args.export_rows * args.export_repeats
+
+    results = {stage: summarize_rounds(stage_rounds, items.get(stage)) for stage, stage_rounds in rounds.items()}
+
+    commit, dirty = get_commit()
+    return {
+        'schema': RESULTS_SCHEMA_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'opencv_threads': cv2.getNumThreads()
+        },
+        'config': {
+            'frames': args.frames,
+            'resolutions': args.resolutions,
+            'detect_frames': args.detect_frames,
+            'warmup': args.warmup,
+            'rounds': args.rounds,
+            'every_n': args.every_n,
+            'export_rows': args.export_rows,
+            'export_repeats': args.export_repeats,
+            'skip_detection': args.skip_detection
+        },
+        'results': results
+    }
+
+
+def print_results(document):
+    """Print a human-readable table of results"""
+    print("\n" + "=" * 60)
+    print("📊 BENCHMARK RESULTS")
+    print(f"   Commit: {document['commit']}{' (dirty)' if document['dirty'] else ''}")
+    print(f"   Median of {document['config']['rounds']} rounds, {document['config']['warmup']} warmup iterations each")
+    print("=" * 60)
+    print(f"{'Stage':<56}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'per s':>10}")
+    for stage, stats in document['results'].items():
+        if stats is None:
+            continue
+        print(f"{stage:<56}{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['throughput_per_s']:>10.1f}")
+
+
+def compare_results(baseline, current, threshold):
+    """Print per-stage changes against a baseline and return the list of regressed stages
+
+    A change only counts as a regression when it exceeds both the threshold and
+    the combined spread between rounds of the two runs, which bounds how far two
+    medians can drift apart without any real change. Stages measured in the
+    baseline but missing from the current results are regressions too.
+    """
+    regressions = []
+
+    print("\n" + "=" * 60)
+    print(f"🔍 COMPARISON WITH {baseline.get('commit')}")
+    print("=" * 60)
+
+    if baseline.get('config') != current.get('config'):
+        print("⚠ Benchmark configuration differs from the baseline, results may not be comparable")
+
+    baseline_results = baseline.get('results', {})
+    for stage, old_stats in baseline_results.items():
+        if old_stats is not None and current['results'].get(stage) is None:
+            print(f"❌ {stage:<56}missing from the current results")
+            regressions.append(stage)
+
+    for stage, stats in current['results'].items():
+        old_stats = baseline_results.get(stage)
+        if stats is None:
+            continue
+        if old_stats is None:
+            print(f"  {stage:<56}new stage, no baseline")
+            continue
+
+        changes = []
+        regressed = False
+        for metric in ('p50_ms', 'p90_ms'):
+            if old_stats[metric] <= 0:
+                continue
+            spread_key = f"{metric[:3]}_spread"
+            allowed = max(threshold, old_stats.get(spread_key, 0.0) + stats.get(spread_key, 0.0))
+            change = stats[metric] / old_stats[metric] - 1.0
+            changes.append(f"{metric} {change:+.1%} (allowed {allowed:.0%})")
+            if change > allowed:
+                regressed = True
+
+        marker = "❌" if regressed else "✓"
+        print(f"{marker} {stage:<56}{', '.join(changes)}")
+        if regressed:
+            regressions.append(stage)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the emotion detector pipeline headless on CPU")
+    parser.add_argument('--frames', type=int, default=150,
+                        help="Frames per clip used for capture and overlay")
+    parser.add_argument('--resolutions', default="640x480,1280x720",
+                        help="Comma-separated WIDTHxHEIGHT list of synthetic clips")
+    parser.add_argument('--video', action='append', default=[],
+                        help="Additional recorded clip to benchmark (can be repeated)")
+    parser.add_argument('--no-fixtures', action='store_true',
+                        help="Do not benchmark clips in benchmark_fixtures/")
+    parser.add_argument('--skip-detection', action='store_true',
+                        help="Skip stages that need the detection models")
+    parser.add_argument('--detect-frames', type=int, default=20,
+                        help="Frames timed through the detector per clip")
+    parser.add_argument('--warmup', type=int, default=3,
+                        help="Iterations of every stage discarded before timing")
+    parser.add_argument('--rounds', type=int, default=5,
+                        help="Times every stage is run; reported percentiles are the median over rounds")
+    parser.add_argument('--every-n', default="1,3",
+                        help="Comma-separated PROCESS_EVERY_N_FRAMES values for the pipeline stage")
+    parser.add_argument('--export-rows', type=int, default=3000,
+                        help="Data points recorded and exported (3000 = 5 minutes at 0.1s)")
+    parser.add_argument('--export-repeats', type=int, default=5,
+                        help="Number of timed Excel exports per round")
+    parser.add_argument('--output', default="benchmark_results.json",
+                        help="Path of the JSON results file")
+    parser.add_argument('--compare', help="Baseline JSON results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Relative p50/p90 slowdown reported as a regression, raised per stage to "
+                             "the combined spread between rounds of both results files")
+    args = parser.parse_args()
+
+    document = run_benchmarks(args)
+    print_results(document)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    print(f"\n💾 Results saved: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, document, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) regressed or missing")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""
+Live localhost dashboard for emotion, gaze, head pose and blink metrics.
+
+Samples pushed from the capture loop are aggregated in a background thread into
+fixed-width min/max/mean buckets, and only newly closed buckets are streamed to
+browsers over Server-Sent Events. When the history grows too long the bucket
+width doubles for old and new buckets alike, so multi-hour sessions stay small
+on both ends while every bucket keeps the same width.
+"""
+import json
+import math
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_PENDING_MESSAGES = 256  # Per browser, before it is considered too slow and disconnected
+
+
+def bucket_start(current_time, width):
+    """Start of the aligned bucket of the given width containing current_time"""
+    return round(math.floor(current_time / width + 1e-9) * width, 6)
+
+
+def merge_buckets(first, second):
+    """Merge two buckets covering the same aligned time range"""
+    series = {}
+    for name in first['s'].keys() | second['s'].keys():
+        a = first['s'].get(name)
+        b = second['s'].get(name)
+        if a is None or b is None:
+            series[name] = list(a or b)
+            continue
+        count = a[3] + b[3]
+        series[name] = [min(a[0], b[0]), max(a[1], b[1]), (a[2] * a[3] + b[2] * b[3]) / count, count]
+
+    return {'t': first['t'], 'w': first['w'], 's': series}
+
+
+def append_bucket(buckets, bucket):
+    """Append a closed bucket, merging it into the last one if both cover the same range"""
+    if buckets and buckets[-1]['t'] == bucket['t']:
+        buckets[-1] = merge_buckets(buckets[-1], bucket)
+    else:
+        buckets.append(bucket)
+
+
+def compact_buckets(buckets, width):
+    """Regroup buckets into aligned buckets of a larger width"""
+    compacted = []
+    for bucket in buckets:
+        append_bucket(compacted, {'t': bucket_start(bucket['t'], width), 'w': width, 's': bucket['s']})
+    return compacted
+
+
+class LiveDashboard:
+    """Local HTTP server streaming downsampled metric buckets to a browser"""
+
+    def __init__(self, charts, host='127.0.0.1', port=8050, bucket_seconds=1.0,
+                 max_buckets=1800, flush_interval=0.5):
+        # charts: list of (title, [series names]) shown as one chart each
+        self.charts = [{'title': title, 'series': list(series)} for title, series in charts]
+        self.bucket_seconds = bucket_seconds
+        self.bucket_width = bucket_seconds  # Grows as the history is compacted
+        self.max_buckets = max_buckets
+        self.flush_interval = flush_interval
+
+        self._samples = queue.SimpleQueue()
+        self._lock = threading.Lock()  # Guards history and subscribers
+        self._history = []
+        self._subscribers = []
+        self._open_bucket = None
+        self._last_sample_at = 0.0
+        self.dropped_samples = 0
+        self.skipped_values = 0  # Non-numeric or non-finite values, e.g. NaN when no face is found
+        self._stop_event = threading.Event()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._aggregator_thread = threading.Thread(target=self._aggregate, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._server_thread.start()
+        self._aggregator_thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._aggregator_thread.join()
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.put(None)
+            self._subscribers = []
+        self._server.shutdown()
+        self._server.server_close()
+
+    def push(self, current_time, values):
+        """Queue one sample; never blocks the caller"""
+        self._samples.put((current_time, values))
+
+    def reset(self):
+        """Drop all history, e.g. when data collection is reset"""
+        self._samples.put(None)
+
+    # Aggregation
+
+    def _aggregate(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        closed = []
+        reset = False
+
+        while True:
+            try:
+                sample = self._samples.get_nowait()
+            except queue.Empty:
+                break
+
+            if sample is None:
+                closed.clear()
+                self._open_bucket = None
+                self.bucket_width = self.bucket_seconds
+                reset = True
+                continue
+
+            try:
+                self._add_sample(sample, closed)
+            except Exception:
+                # A malformed sample must not stop the aggregator for the rest of the session
+                self.dropped_samples += 1
+
+        # Publish a bucket that stopped receiving samples (face lost, detection stalled, session ended)
+        if self._open_bucket is not None and time.monotonic() - self._last_sample_at >= self.bucket_seconds:
+            closed.append(self._open_bucket)
+            self._open_bucket = None
+
+        if reset or closed:
+            with self._lock:
+                if reset:
+                    self._history = []
+                    self._broadcast('reset', {'width': self.bucket_width})
+                if closed:
+                    for bucket in closed:
+                        append_bucket(self._history, bucket)
+                    self._broadcast('buckets', closed)
+
+                    if len(self._history) > self.max_buckets:
+                        while len(self._history) > self.max_buckets:
+                            self.bucket_width *= 2
+                            self._history = compact_buckets(self._history, self.bucket_width)
+                        if self._open_bucket is not None:
+                            self._open_bucket['t'] = bucket_start(self._open_bucket['t'], self.bucket_width)
+                            self._open_bucket['w'] = self.bucket_width
+                        self._broadcast('rescale', {'width': self.bucket_width})
+
+    def _add_sample(self, sample, closed):
+        current_time, values = sample
+        current_time = float(current_time)
+
+        bucket = self._open_bucket
+        if bucket is not None and not bucket['t'] <= current_time < bucket['t'] + bucket['w']:
+            closed.append(bucket)
+            bucket = None
+        if bucket is None:
+            bucket = {'t': bucket_start(current_time, self.bucket_width), 'w': self.bucket_width, 's': {}}
+            self._open_bucket = bucket
+        self._last_sample_at = time.monotonic()
+
+        for name, value in values.items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                self.skipped_values += 1
+                continue
+            if not math.isfinite(value):
+                self.skipped_values += 1
+                continue
+            stats = bucket['s'].get(name)
+            if stats is None:
+                bucket['s'][name] = [value, value, value, 1]
+            else:
+                stats[3] += 1
+                stats[0] = min(stats[0], value)
+                stats[1] = max(stats[1], value)
+                stats[2] += (value - stats[2]) / stats[3]
+
+    def _broadcast(self, event, data):
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+        for subscriber in list(self._subscribers):
+            if subscriber.qsize() >= MAX_PENDING_MESSAGES:
+                # Slow browser: disconnect it, it reconnects and gets a fresh snapshot
+                self._subscribers.remove(subscriber)
+                subscriber.put(None)
+            else:
+                subscriber.put(message)
+
+    def _subscribe(self):
+        subscriber = queue.Queue()
+        with self._lock:
+            snapshot = {
+                'charts': self.charts,
+                'width': self.bucket_width,
+                'buckets': self._history
+            }
+            subscriber.put(f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n".encode('utf-8'))
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def _unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    # HTTP
+
+    def _make_handler(self):
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/':
+                    body = DASHBOARD_HTML.encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif self.path == '/events':
+                    self._stream_events()
+                else:
+                    self.send_error(404)
+
+            def _stream_events(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+
+                subscriber = dashboard._subscribe()
+                try:
+                    while not dashboard._stop_event.is_set():
+                        try:
+                            message = subscriber.get(timeout=15)
+                        except queue.Empty:
+                            message = b": keepalive\n\n"
+                        if message is None:
+                            break
+                        self.wfile.write(message)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    dashboard._unsubscribe(subscriber)
+
+            def log_message(self, format, *args):
+                pass  # Keep the console for the detector output
+
+        return Handler
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Live Emotion Dashboard</title>
+<style>
+  body { background: #202020; color: #eee; font-family: Arial, sans-serif; margin: 16px; }
+  h1 { font-size: 20px; margin: 0 0 8px 0; }
+  #status { font-size: 13px; color: #aaa; margin-bottom: 12px; }
+  .chart { background: #2b2b2b; border-radius: 6px; padding: 8px; margin-bottom: 12px; }
+  .chart h2 { font-size: 15px; margin: 0 0 4px 0; }
+  .legend span { font-size: 12px; margin-right: 12px; }
+  canvas { width: 100%; height: 220px; display: block; }
+  select { background: #333; color: #eee; border: 1px solid #555; }
+</style>
+</head>
+<body>
+<h1>Live Emotion Dashboard</h1>
+<div id="status">Connecting...</div>
+<div>Window:
+  <select id="window">
+    <option value="60">1 min</option>
+    <option value="600" selected>10 min</option>
+    <option value="3600">1 hour</option>
+    <option value="0">Whole session</option>
+  </select>
+</div>
+<div id="charts"></div>
+<script>
+const COLORS = ['#e6194b', '#3cb44b', '#ffe119', '#4363d8', '#f58231', '#911eb4', '#46f0f0',
+                '#f032e6', '#bcf60c', '#fabebe'];
+let charts = [];
+let buckets = [];
+let dirty = false;
+
+function bucketStart(t, width) {
+  return Math.round(Math.floor(t / width + 1e-9) * width * 1e6) / 1e6;
+}
+
+function mergeBuckets(a, b) {
+  const s = {};
+  for (const name of new Set([...Object.keys(a.s), ...Object.keys(b.s)])) {
+    const x = a.s[name], y = b.s[name];
+    if (!x || !y) { s[name] = (x || y).slice(); continue; }
+    const n = x[3] + y[3];
+    s[name] = [Math.min(x[0], y[0]), Math.max(x[1], y[1]), (x[2] * x[3] + y[2] * y[3]) / n, n];
+  }
+  return {t: a.t, w: a.w, s: s};
+}
+
+// Same rules as append_bucket / compact_buckets on the server, so both histories stay identical
+function appendBucket(list, bucket) {
+  if (list.length && list[list.length - 1].t === bucket.t) {
+    list[list.length - 1] = mergeBuckets(list[list.length - 1], bucket);
+  } else {
+    list.push(bucket);
+  }
+}
+
+function rescale(width) {
+  const out = [];
+  for (const b of buckets) appendBucket(out, {t: bucketStart(b.t, width), w: width, s: b.s});
+  buckets = out;
+}
+
+function buildCharts(config) {
+  const container = document.getElementById('charts');
+  container.innerHTML = '';
+  charts = config.map(chart => {
+    const div = document.createElement('div');
+    div.className = 'chart';
+    const legend = chart.series.map((name, i) =>
+      `<span style="color:${COLORS[i % COLORS.length]}">&#9632; ${name}</span>`).join('');
+    div.innerHTML = `<h2>${chart.title}</h2><div class="legend">${legend}</div><canvas></canvas>`;
+    container.appendChild(div);
+    return {series: chart.series, canvas: div.querySelector('canvas')};
+  });
+}
+
+function draw() {
+  if (!dirty) { requestAnimationFrame(draw); return; }
+  dirty = false;
+  const windowSeconds = Number(document.getElementById('window').value);
+  const end = buckets.length ? buckets[buckets.length - 1].t + buckets[buckets.length - 1].w : 0;
+  const start = windowSeconds > 0 ? Math.max(0, end - windowSeconds) : (buckets.length ? buckets[0].t : 0);
+  const visible = buckets.filter(b => b.t + b.w >= start);
+
+  for (const chart of charts) {
+    const canvas = chart.canvas;
+    const width = canvas.width = canvas.clientWidth * devicePixelRatio;
+    const height = canvas.height = canvas.clientHeight * devicePixelRatio;
+    const ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, width, height);
+
+    let lo = Infinity, hi = -Infinity;
+    for (const b of visible) for (const name of chart.series) {
+      const v = b.s[name];
+      if (v) { lo = Math.min(lo, v[0]); hi = Math.max(hi, v[1]); }
+    }
+    if (!isFinite(lo)) continue;
+    if (hi - lo < 1e-6) { hi += 1; lo -= 1; }
+
+    const pad = 30 * devicePixelRatio;
+    const x = t => pad + (t - start) / Math.max(end - start, 1e-6) * (width - pad);
+    const y = v => height - pad / 2 - (v - lo) / (hi - lo) * (height - pad);
+
+    ctx.fillStyle = '#888';
+    ctx.font = `${10 * devicePixelRatio}px Arial`;
+    ctx.fillText(hi.toFixed(1), 2, y(hi) + 10 * devicePixelRatio);
+    ctx.fillText(lo.toFixed(1), 2, y(lo));
+    ctx.fillText(`${start.toFixed(0)}s`, pad, height - 2);
+    ctx.fillText(`${end.toFixed(0)}s`, width - pad, height - 2);
+
+    chart.series.forEach((name, i) => {
+      const color = COLORS[i % COLORS.length];
+      const points = visible.filter(b => b.s[name]).map(b => [b.t + b.w / 2, b.s[name]]);
+      if (!points.length) return;
+
+      // Min/max band
+      ctx.globalAlpha = 0.15;
+      ctx.fillStyle = color;
+      ctx.beginPath();
+      points.forEach(([t, v], j) => j ? ctx.lineTo(x(t), y(v[1])) : ctx.moveTo(x(t), y(v[1])));
+      for (let j = points.length - 1; j >= 0; j--) ctx.lineTo(x(points[j][0]), y(points[j][1][0]));
+      ctx.closePath();
+      ctx.fill();
+
+      // Mean line
+      ctx.globalAlpha = 1.0;
+      ctx.strokeStyle = color;
+      ctx.lineWidth = 1.5 * devicePixelRatio;
+      ctx.beginPath();
+      points.forEach(([t, v], j) => j ? ctx.lineTo(x(t), y(v[2])) : ctx.moveTo(x(t), y(v[2])));
+      ctx.stroke();
+    });
+  }
+  requestAnimationFrame(draw);
+}
+
+function updateStatus(text) {
+  const end = buckets.length ? buckets[buckets.length - 1].t + buckets[buckets.length - 1].w : 0;
+  document.getElementById('status').textContent =
+    `${text} | Session time: ${end.toFixed(0)}s | Buckets: ${buckets.length}`;
+}
+
+const source = new EventSource('/events');
+source.addEventListener('snapshot', e => {
+  const data = JSON.parse(e.data);
+  buildCharts(data.charts);
+  buckets = data.buckets;
+  dirty = true;
+  updateStatus('Live');
+});
+source.addEventListener('buckets', e => {
+  for (const bucket of JSON.parse(e.data)) appendBucket(buckets, bucket);
+  dirty = true;
+  updateStatus('Live');
+});
+source.addEventListener('rescale', e => {
+  rescale(JSON.parse(e.data).width);
+  dirty = true;
+});
+source.addEventListener('reset', () => {
+  buckets = [];
+  dirty = true;
+  updateStatus('Live (reset)');
+});
+source.onerror = () => updateStatus('Disconnected, retrying...');
+document.getElementById('window').addEventListener('change', () => { dirty = true; });
+window.addEventListener('resize', () => { dirty = true; });
+requestAnimationFrame(draw);
+</script>
+</body>
+</html>
+"""
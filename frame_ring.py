@@ -0,0 +1,165 @@
+"""
+Shared-memory ring of preallocated frame buffers.
+
+Capture decodes straight into a free slot; consumers (detection process,
+renderer, recorder) read the slot by index and release it when done, so
+frames are never pickled or copied between capture and its consumers.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+class FrameRing:
+    """Fixed number of equally sized frame slots in shared memory with per-slot reference counts"""
+
+    def __init__(self, slot_count, shape, dtype=np.uint8):
+        self.slot_count = slot_count
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_size = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.frame_size * slot_count)
+        self._refcounts = multiprocessing.Array('i', slot_count)  # Guarded by its own lock
+        self._next_slot = 0
+        self._owner_pid = os.getpid()  # Forked children inherit this object but must not unlink
+        self._views = self._make_views()
+
+    def _make_views(self):
+        return [np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf,
+                           offset=slot * self.frame_size)
+                for slot in range(self.slot_count)]
+
+    def __getstate__(self):
+        # Only passed to child processes on creation (multiprocessing.Array requires inheritance)
+        return {
+            'name': self._shm.name,
+            'slot_count': self.slot_count,
+            'shape': self.shape,
+            'dtype': self.dtype.str,
+            'refcounts': self._refcounts,
+            'owner_pid': self._owner_pid
+        }
+
+    def __setstate__(self, state):
+        self.slot_count = state['slot_count']
+        self.shape = state['shape']
+        self.dtype = np.dtype(state['dtype'])
+        self.frame_size = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._refcounts = state['refcounts']
+        self._next_slot = 0
+        self._owner_pid = state['owner_pid']
+        self._views = self._make_views()
+
+    def acquire(self):
+        """Reserve a free slot for writing and return its index, or None if every slot is in use"""
+        with self._refcounts.get_lock():
+            for i in range(self.slot_count):
+                slot = (self._next_slot + i) % self.slot_count
+                if self._refcounts[slot] == 0:
+                    self._refcounts[slot] = 1
+                    self._next_slot = (slot + 1) % self.slot_count
+                    return slot
+        return None
+
+    def retain(self, slot, count=1):
+        """Add references to a slot before handing it to other consumers"""
+        with self._refcounts.get_lock():
+            self._refcounts[slot] += count
+
+    def release(self, slot):
+        """Drop one reference; the slot becomes free for capture when none remain"""
+        with self._refcounts.get_lock():
+            if self._refcounts[slot] > 0:
+                self._refcounts[slot] -= 1
+
+    def view(self, slot):
+        """Return the numpy array backed by a slot (no copy)"""
+        return self._views[slot]
+
+    def read(self, cap):
+        """Decode the next frame from a cv2.VideoCapture into a free slot
+
+        Returns (ret, slot). slot is None when the stream ended or every slot is
+        still held by a consumer.
+        """
+        slot = self.acquire()
+        if slot is None:
+            return cap.grab(), None
+
+        view = self._views[slot]
+        ret, frame = cap.read(view)
+        if not ret:
+            self.release(slot)
+            return False, None
+
+        if frame is not view:
+            # Backend could not decode in place (e.g. resolution changed)
+            if frame.shape != self.shape or frame.dtype != self.dtype:
+                self.release(slot)
+                return True, None
+            np.copyto(view, frame)
+
+        return True, slot
+
+    def close(self):
+        """Detach from the shared memory; the creating process also frees it"""
+        self._views = []
+        self._shm.close()
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
+
+
+class RingRecorder(threading.Thread):
+    """Background thread that writes ring slots to a video file and releases them"""
+
+    def __init__(self, ring, path, fps, max_pending=None):
+        super().__init__(daemon=True)
+        self.ring = ring
+        self.path = path
+        height, width = ring.shape[:2]
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+        self.slots = queue.Queue(maxsize=max_pending or ring.slot_count // 2)
+        self.dropped_frames = 0
+
+    def is_opened(self):
+        return self.writer.isOpened()
+
+    def submit(self, slot):
+        """Queue a slot for writing; the recorder takes its own reference"""
+        self.ring.retain(slot)
+        try:
+            self.slots.put_nowait(slot)
+        except queue.Full:
+            # Never block capture on a slow disk
+            self.ring.release(slot)
+            self.dropped_frames += 1
+
+    def run(self):
+        try:
+            while True:
+                slot = self.slots.get()
+                if slot is None:
+                    break
+                try:
+                    self.writer.write(self.ring.view(slot))
+                finally:
+                    self.ring.release(slot)
+        finally:
+            self.writer.release()
+
+    def stop(self, timeout=5.0):
+        """Finish writing queued frames; never hangs if the writer thread has died"""
+        if self.is_alive():
+            try:
+                self.slots.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+        self.join(timeout=timeout)
@@ -0,0 +1,214 @@
+import json
+import math
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard import DASHBOARD_HTML, LiveDashboard, append_bucket, bucket_start, compact_buckets
+
+CHARTS = [('Emotions (%)', ['happiness', 'sadness']), ('Gaze', ['gaze_x'])]
+SAMPLE_RATE = 10  # Samples per second of session time, as with FIXED_TIME_STEP
+FLUSH_EVERY = 5  # Samples per aggregator flush (0.5 s of session time)
+
+
+class ReplayClient:
+    """Browser stand-in: parses the SSE stream and applies it like the dashboard page does"""
+
+    def __init__(self, dashboard):
+        self.subscriber = dashboard._subscribe()
+        self.buckets = None
+        self.events = []
+
+    def drain(self):
+        while True:
+            try:
+                message = self.subscriber.get_nowait()
+            except queue.Empty:
+                return
+            assert message is not None, "client was disconnected"
+
+            lines = message.decode('utf-8').strip().split('\n')
+            event = lines[0][len('event: '):]
+            data = json.loads(lines[1][len('data: '):])
+            self.events.append((event, json.loads(lines[1][len('data: '):])))  # Kept as received
+
+            if event == 'snapshot':
+                self.buckets = data['buckets']
+            elif event == 'buckets':
+                for bucket in data:
+                    append_bucket(self.buckets, bucket)
+            elif event == 'rescale':
+                self.buckets = compact_buckets(self.buckets, data['width'])
+            elif event == 'reset':
+                self.buckets = []
+
+
+def make_dashboard(**kwargs):
+    return LiveDashboard(CHARTS, port=0, flush_interval=0.02, **kwargs)
+
+
+def normalize(buckets):
+    """Buckets with means rounded, so float summation order does not matter"""
+    return [(b['t'], b['w'], sorted((name, s[0], s[1], round(s[2], 6), s[3]) for name, s in b['s'].items()))
+            for b in buckets]
+
+
+def simulate(dashboard, client, seconds, start=0.0):
+    """Push a session of the given length with the face lost now and then; returns samples per series"""
+    pushed = 0
+    for i in range(int(seconds * SAMPLE_RATE)):
+        current_time = start + i / SAMPLE_RATE
+        if int(current_time) % 600 < 45:
+            continue  # No face for the first 45 s of every 10 minutes
+        dashboard.push(current_time, {
+            'happiness': (i * 7) % 100,
+            'sadness': 100 - (i * 3) % 100,
+            'gaze_x': math.sin(i / 50.0)
+        })
+        pushed += 1
+        if i % FLUSH_EVERY == 0:
+            dashboard._flush()
+            client.drain()
+    dashboard._flush()
+    client.drain()
+    return pushed
+
+
+def total_count(dashboard, name):
+    buckets = dashboard._history + ([dashboard._open_bucket] if dashboard._open_bucket else [])
+    return sum(b['s'][name][3] for b in buckets if name in b['s'])
+
+
+@pytest.fixture
+def dashboard():
+    # Aggregation is driven by calling _flush directly; the threads are not started
+    dashboard = make_dashboard(max_buckets=300)
+    yield dashboard
+    dashboard._server.server_close()
+
+
+@pytest.fixture
+def three_hour_session(dashboard):
+    client = ReplayClient(dashboard)
+    pushed = simulate(dashboard, client, 3 * 3600)
+    return dashboard, client, pushed
+
+
+def test_three_hour_session_keeps_uniform_aligned_buckets(three_hour_session):
+    dashboard, client, pushed = three_hour_session
+    history = dashboard._history
+    width = dashboard.bucket_width
+
+    assert width > dashboard.bucket_seconds
+    assert len(history) <= dashboard.max_buckets
+    assert all(b['w'] == width for b in history)
+    assert all(b['t'] == bucket_start(b['t'], width) for b in history)
+    assert all(a['t'] < b['t'] for a, b in zip(history, history[1:]))
+
+    # Compaction merges buckets but never loses samples
+    for name in ('happiness', 'sadness', 'gaze_x'):
+        assert total_count(dashboard, name) == pushed
+
+
+def test_replayed_stream_matches_server_history(three_hour_session):
+    dashboard, client, _ = three_hour_session
+
+    assert any(event == 'rescale' for event, _ in client.events)
+    assert normalize(client.buckets) == normalize(dashboard._history)
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_dashboard_page_replays_stream_like_server(three_hour_session, tmp_path):
+    dashboard, client, _ = three_hour_session
+    events_path = tmp_path / 'events.json'
+    events_path.write_text(json.dumps(client.events))
+
+    # Run the page's own bucket functions on the recorded events, with the handlers' bucket logic
+    script = DASHBOARD_HTML.split('<script>')[1].split('</script>')[0]
+    functions = '\n'.join(script[script.index(f'function {name}('):].split('\n}\n')[0] + '\n}'
+                          for name in ('bucketStart', 'mergeBuckets', 'appendBucket', 'rescale'))
+    replay = functions + f"""
+let buckets = [];
+for (const [event, data] of JSON.parse(require('fs').readFileSync({json.dumps(str(events_path))}, 'utf8'))) {{
+  if (event === 'snapshot') buckets = data.buckets;
+  else if (event === 'buckets') for (const bucket of data) appendBucket(buckets, bucket);
+  else if (event === 'rescale') rescale(data.width);
+  else if (event === 'reset') buckets = [];
+}}
+console.log(JSON.stringify(buckets));
+"""
+    output = subprocess.run(['node'], input=replay, capture_output=True, text=True, timeout=60, check=True)
+
+    assert normalize(json.loads(output.stdout)) == normalize(dashboard._history)
+
+
+def test_non_finite_values_are_skipped_and_counted(dashboard):
+    dashboard.push(0.0, {'happiness': float('nan'), 'sadness': float('inf'), 'gaze_x': 'n/a'})
+    dashboard.push(0.1, {'happiness': 50.0, 'sadness': None})
+    dashboard.push(0.2, None)  # Malformed sample
+    dashboard._flush()
+
+    assert dashboard.skipped_values == 4
+    assert dashboard.dropped_samples == 1
+    assert dashboard._open_bucket['s'] == {'happiness': [50.0, 50.0, 50.0, 1]}
+
+    # The aggregator keeps going after bad input
+    dashboard.push(1.0, {'happiness': 70.0})
+    dashboard._flush()
+    assert dashboard._history[-1]['s'] == {'happiness': [50.0, 50.0, 50.0, 1]}
+
+
+def test_reset_clears_history_and_width(dashboard):
+    client = ReplayClient(dashboard)
+    simulate(dashboard, client, 1800)
+    assert dashboard.bucket_width > dashboard.bucket_seconds
+
+    dashboard.reset()
+    dashboard._flush()
+    client.drain()
+
+    assert dashboard._history == []
+    assert dashboard._open_bucket is None
+    assert dashboard.bucket_width == dashboard.bucket_seconds
+    assert client.events[-1] == ('reset', {'width': dashboard.bucket_seconds})
+    assert client.buckets == []
+
+    # A new session starts over at the base width, for open and newly connected browsers alike
+    simulate(dashboard, client, 60, start=60.0)
+    assert all(b['w'] == dashboard.bucket_seconds for b in dashboard._history)
+    assert normalize(client.buckets) == normalize(dashboard._history)
+
+    late_client = ReplayClient(dashboard)
+    late_client.drain()
+    assert late_client.events[0][1]['width'] == dashboard.bucket_seconds
+    assert normalize(late_client.buckets) == normalize(dashboard._history)
+
+
+def test_idle_open_bucket_is_published_after_bucket_seconds():
+    dashboard = make_dashboard(bucket_seconds=0.2)
+    dashboard.start()
+    try:
+        with urllib.request.urlopen(dashboard.url, timeout=5) as response:
+            assert b'EventSource' in response.read()
+
+        client = ReplayClient(dashboard)
+        pushed_at = time.monotonic()
+        dashboard.push(5.0, {'happiness': 40.0})
+
+        deadline = time.monotonic() + 5
+        while not client.buckets and time.monotonic() < deadline:
+            time.sleep(0.01)
+            client.drain()
+
+        assert time.monotonic() - pushed_at >= dashboard.bucket_seconds
+        assert client.buckets == [{'t': 5.0, 'w': 0.2, 's': {'happiness': [40.0, 40.0, 40.0, 1]}}]
+    finally:
+        dashboard.stop()
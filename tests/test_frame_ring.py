@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_ring import FrameRing, RingRecorder
+
+
+def read_and_release(ring, slot, results):
+    """Child process: read a slot by index, release it and detach from the ring"""
+    results.put(int(ring.view(slot).sum()))
+    ring.release(slot)
+    ring.close()
+
+
+def test_ring_shared_with_child_process_and_closed_on_both_sides():
+    ring = FrameRing(2, (4, 4, 3))
+    slot = ring.acquire()
+    ring.view(slot)[:] = 1
+    ring.retain(slot)
+
+    results = multiprocessing.Queue()
+    child = multiprocessing.Process(target=read_and_release, args=(ring, slot, results))
+    child.start()
+    assert results.get(timeout=30) == 4 * 4 * 3
+    child.join(timeout=30)
+    assert child.exitcode == 0
+
+    # The child dropped its reference; only the capture reference is left
+    ring.release(slot)
+    assert ring.acquire() is not None
+
+    # Closing in the creating process must still find the segment to unlink
+    ring.close()
+
+
+class FailingWriter:
+    def write(self, frame):
+        raise OSError("disk full")
+
+    def release(self):
+        pass
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_recorder_stop_returns_when_writer_thread_died():
+    ring = FrameRing(4, (4, 4, 3))
+    recorder = RingRecorder(ring, os.devnull, 30, max_pending=1)
+    recorder.writer = FailingWriter()
+    recorder.start()
+
+    slot = ring.acquire()
+    recorder.submit(slot)
+    recorder.join(timeout=5)
+    assert not recorder.is_alive()
+
+    # Fill the queue the dead thread will never drain
+    recorder.submit(slot)
+    assert recorder.slots.full()
+
+    recorder.stop(timeout=0.5)
+    ring.close()
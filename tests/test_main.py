@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main
+
+
+def make_result(generation, result_time):
+    """A detection process result for one face, as sent by detection_worker"""
+    results = pd.DataFrame([{
+        'FaceRectX': 10, 'FaceRectY': 40, 'FaceRectWidth': 50, 'FaceRectHeight': 60,
+        'anger': 0.1, 'disgust': 0.0, 'fear': 0.0, 'happiness': 0.7,
+        'sadness': 0.1, 'surprise': 0.05, 'neutral': 0.05, 'AU43': 0.9
+    }])
+    return generation, result_time, results, None
+
+
+def test_result_started_before_reset_is_dropped():
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    Main.reset_session()
+
+    # Detection of a frame from late in the old session is still in flight when R is pressed
+    stale = make_result(Main.session_generation, 500.0)
+    Main.reset_session()
+    Main.handle_detection_result(frame, stale)
+
+    assert Main.time_stamps == []
+    assert Main.last_recorded_time == 0
+    assert Main.last_blink_check == 0
+
+    # Results from the new session are recorded from its start
+    for i in range(1, 4):
+        Main.handle_detection_result(frame, make_result(Main.session_generation, i * 1.0))
+    assert Main.time_stamps == [1.0, 2.0, 3.0]
+
+    Main.reset_session()